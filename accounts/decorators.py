@@ -1,4 +1,8 @@
+from functools import wraps
+
 from django.core.exceptions import PermissionDenied
+from rest_framework import status
+from rest_framework.response import Response
 
 def role_required(allowed_roles):
     def decorator(view_func):
@@ -10,4 +14,18 @@ def role_required(allowed_roles):
                 raise PermissionDenied
             return view_func(request, *args, **kwargs)
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
+
+def api_roles_required(*roles):
+    """DRF counterpart of role_required: returns a 403 Response. Place below @api_view."""
+    allowed = frozenset(roles)
+    denied = {'error': 'Permission denied'}
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if getattr(request.user, 'role', None) not in allowed:
+                return Response(denied, status=status.HTTP_403_FORBIDDEN)
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -1,27 +1,173 @@
+import hashlib
+import json
+
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.utils.encoders import JSONEncoder
 from django.core.exceptions import PermissionDenied
 from django.shortcuts import get_object_or_404
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.core.cache import cache
+from django.db import transaction
 
 from accounts.models import User
+from accounts.decorators import api_roles_required
 from .models import Employee, Department, Designation, EmployeeProfile
+from .cache import DESIGNATIONS_CACHE_KEY, DESIGNATIONS_CACHE_TTL
 from .serializers import (
     EmployeeSerializer, DepartmentSerializer, DesignationSerializer,
     EmployeeProfileSerializer, EmployeeCreateSerializer
 )
 
 
+_ADMIN_HR = frozenset(("ADMIN", "HR"))
+
+
+class EmployeeListPagination(LimitOffsetPagination):
+    # Caps ?limit= on both the offset and the keyset paths of employee_list_api
+    max_limit = 500
+
+# Columns needed to build the EmployeeSerializer shape for the admin/HR list without model instances
+EMPLOYEE_LIST_FIELDS = (
+    "id", "employee_id", "department_id", "designation_id", "date_of_joining", "basic_salary",
+    "user__id", "user__username", "user__email", "user__first_name", "user__last_name", "user__role",
+    "department__name", "designation__name", "managing_department__id",
+)
+
+
+def _employee_list_row(row):
+    # Same output as EmployeeSerializer, built straight from a values() row
+    data = {
+        "id": row["id"],
+        "user": {
+            "id": row["user__id"],
+            "username": row["user__username"],
+            "email": row["user__email"],
+            "first_name": row["user__first_name"],
+            "last_name": row["user__last_name"],
+            "role": row["user__role"],
+        },
+        "employee_id": row["employee_id"],
+        "department": row["department_id"],
+        "department_name": row["department__name"],
+        "designation": row["designation_id"],
+        "designation_name": row["designation__name"],
+        "date_of_joining": row["date_of_joining"].isoformat(),
+        "basic_salary": f"{row['basic_salary']:.2f}",
+        "is_manager": row["managing_department__id"] is not None,
+    }
+    # EmployeeSerializer leaves the *_name keys out when the relation is unset
+    if row["department_id"] is None:
+        del data["department_name"]
+    if row["designation_id"] is None:
+        del data["designation_name"]
+    return data
+
+
+# Columns needed to build the DepartmentSerializer shape for departments_api
+DEPARTMENT_LIST_FIELDS = (
+    "id", "name", "manager_id",
+    "manager__user__first_name", "manager__user__last_name", "manager__user__username",
+)
+
+
+def _department_row(row):
+    # Same output as DepartmentSerializer, built straight from a values() row
+    manager_name = None
+    if row["manager_id"] is not None:
+        full_name = f'{row["manager__user__first_name"]} {row["manager__user__last_name"]}'.strip()
+        manager_name = full_name or row["manager__user__username"]
+    return {
+        "id": row["id"],
+        "name": row["name"],
+        "manager": row["manager_id"],
+        "manager_name": manager_name,
+    }
+
+
+# Request fields editable through employee_detail_api, mapped to the columns they write
+EMPLOYEE_UPDATE_COLUMNS = {
+    "department": "department_id",
+    "designation": "designation_id",
+    "date_of_joining": "date_of_joining",
+    "basic_salary": "basic_salary",
+}
+
+
+def _employee_updates(data):
+    return {column: data[field] for field, column in EMPLOYEE_UPDATE_COLUMNS.items() if field in data}
+
+
+def _user_profile(user):
+    # Reuses a profile joined through select_related("user__profile"); creates one only if missing
+    try:
+        return user.profile
+    except EmployeeProfile.DoesNotExist:
+        return EmployeeProfile.objects.get_or_create(user=user)[0]
+
+
+def _content_etag(payload):
+    # Strong ETag over everything the response shows, so a changed row always changes the tag
+    encoded = json.dumps(payload, cls=JSONEncoder, separators=(",", ":")).encode()
+    return quote_etag(hashlib.md5(encoded, usedforsecurity=False).hexdigest())
+
+
+def _stream_json_list(queryset, to_representation, chunk_size=2000):
+    # iterator() uses a server-side cursor on PostgreSQL, so only one chunk of rows is held at a time
+    yield "["
+    for index, obj in enumerate(queryset.iterator(chunk_size=chunk_size)):
+        if index:
+            yield ","
+        yield json.dumps(to_representation(obj), cls=JSONEncoder, separators=(",", ":"))
+    yield "]"
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def employee_list_api(request):
     user = request.user
-    if user.role in ["ADMIN", "HR"]:
-        employees = Employee.objects.select_related("user", "department", "designation")
-        serializer = EmployeeSerializer(employees, many=True)
-        return Response(serializer.data)
-    elif user.role == "EMPLOYEE":
+    role = getattr(user, 'role', None)
+    if role in _ADMIN_HR:
+        employees = Employee.objects.values(*EMPLOYEE_LIST_FIELDS).order_by("id")
+
+        paginator = EmployeeListPagination()
+
+        # Keyset pagination: ?after=<id> skips the OFFSET scan and the COUNT on large tables
+        after = request.GET.get("after")
+        if after:
+            try:
+                after = int(after)
+            except (TypeError, ValueError):
+                return Response({'error': 'after must be an integer id'}, status=status.HTTP_400_BAD_REQUEST)
+            employees = employees.filter(id__gt=after)
+
+            limit = paginator.get_limit(request)
+            if limit is not None:
+                # One extra row tells whether another page follows
+                rows = list(employees[:limit + 1])
+                page = rows[:limit]
+                return Response({
+                    'next_after': page[-1]["id"] if len(rows) > limit else None,
+                    'results': [_employee_list_row(row) for row in page],
+                })
+
+        # ?limit=&offset= returns a bounded page; without them the full list is kept for existing clients
+        page = paginator.paginate_queryset(employees, request)
+        if page is not None:
+            return paginator.get_paginated_response([_employee_list_row(row) for row in page])
+
+        # Full dump is streamed row by row instead of being built in memory
+        return StreamingHttpResponse(
+            _stream_json_list(employees, _employee_list_row),
+            content_type="application/json"
+        )
+    elif role == "EMPLOYEE":
         try:
             employee = Employee.objects.select_related("user", "department", "designation").get(user=user)
             serializer = EmployeeSerializer(employee)
@@ -34,43 +180,43 @@ def employee_list_api(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@api_roles_required("ADMIN", "HR")
 def create_employee_api(request):
-    if request.user.role not in ["ADMIN", "HR"]:
-        return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
-    
     serializer = EmployeeCreateSerializer(data=request.data)
     try:
         if serializer.is_valid():
-            # Check if username already exists
-            user = User.objects.filter(username=serializer.validated_data['username']).first()
-            if user is None:
-                # Create user if not exists
-                user = User.objects.create_user(
-                    username=serializer.validated_data['username'],
-                    password=serializer.validated_data['password'],
-                    first_name=serializer.validated_data.get('first_name', ''),
-                    last_name=serializer.validated_data.get('last_name', ''),
-                    email=serializer.validated_data.get('email', ''),
-                    role='EMPLOYEE'
-                )
-
-            # If employee already exists for this user, return it
-            employee = getattr(user, 'employee', None)
-            if employee is None:
-                employee = Employee.objects.create(
-                    user=user,
-                    department=serializer.validated_data['department'],
-                    designation=serializer.validated_data['designation'],
-                    date_of_joining=serializer.validated_data['date_of_joining'],
-                    basic_salary=serializer.validated_data['basic_salary']
-                )
-                # Create employee profile with default values for required fields
-                EmployeeProfile.objects.create(
-                    user=user,
-                    phone='',
-                    personal_email=user.email or '',
-                    address=''
-                )
+            # User, Employee and EmployeeProfile are committed together or not at all
+            with transaction.atomic():
+                # Check if username already exists
+                user = User.objects.filter(username=serializer.validated_data['username']).first()
+                if user is None:
+                    # Create user if not exists
+                    user = User.objects.create_user(
+                        username=serializer.validated_data['username'],
+                        password=serializer.validated_data['password'],
+                        first_name=serializer.validated_data.get('first_name', ''),
+                        last_name=serializer.validated_data.get('last_name', ''),
+                        email=serializer.validated_data.get('email', ''),
+                        role='EMPLOYEE'
+                    )
+
+                # If employee already exists for this user, return it
+                employee = getattr(user, 'employee', None)
+                if employee is None:
+                    employee = Employee.objects.create(
+                        user=user,
+                        department=serializer.validated_data['department'],
+                        designation=serializer.validated_data['designation'],
+                        date_of_joining=serializer.validated_data['date_of_joining'],
+                        basic_salary=serializer.validated_data['basic_salary']
+                    )
+                    # Create employee profile with default values for required fields
+                    EmployeeProfile.objects.create(
+                        user=user,
+                        phone='',
+                        personal_email=user.email or '',
+                        address=''
+                    )
 
             return Response(
                 EmployeeSerializer(employee).data,
@@ -87,43 +233,37 @@ def create_employee_api(request):
 @permission_classes([IsAuthenticated])
 def employee_detail_api(request, pk):
     user = request.user
-    employee = get_object_or_404(Employee, pk=pk)
+    role = getattr(user, 'role', None)
+    employee_qs = Employee.objects.select_related("user", "department", "designation")
+
+    if request.method == 'PUT' and role in _ADMIN_HR:
+        # ADMIN/HR can update without loading the row first: write only the changed columns
+        updates = _employee_updates(request.data)
+        if updates:
+            Employee.objects.filter(pk=pk).update(**updates)
+        employee = get_object_or_404(employee_qs, pk=pk)
+        return Response(EmployeeSerializer(employee).data)
+
+    employee = get_object_or_404(employee_qs, pk=pk)
     # Only ADMIN/HR or the employee themselves can access
-    if user.role in ["ADMIN", "HR"] or (user.role == "EMPLOYEE" and employee.user_id == user.id):
+    if role in _ADMIN_HR or (role == "EMPLOYEE" and employee.user_id == user.id):
         if request.method == 'GET':
             serializer = EmployeeSerializer(employee)
             return Response(serializer.data)
         elif request.method == 'PUT':
-            # Only ADMIN/HR can update all fields, employee can update only their own allowed fields (if any)
-            if user.role in ["ADMIN", "HR"]:
-                if 'department' in request.data:
-                    employee.department_id = request.data['department']
-                if 'designation' in request.data:
-                    employee.designation_id = request.data['designation']
-                if 'basic_salary' in request.data:
-                    employee.basic_salary = request.data['basic_salary']
-                if 'date_of_joining' in request.data:
-                    employee.date_of_joining = request.data['date_of_joining']
-                employee.save()
+            # Allow employee to update their own department, designation, date_of_joining, basic_salary
+            updates = _employee_updates(request.data)
+            if updates:
+                # Row is already loaded for the ownership check; write only the changed columns
+                for column, value in updates.items():
+                    setattr(employee, column, value)
+                employee.save(update_fields=list(updates))
                 return Response(EmployeeSerializer(employee).data)
-            elif user.role == "EMPLOYEE" and employee.user_id == user.id:
-                # Allow employee to update their own department, designation, date_of_joining, basic_salary
-                allowed_fields = ["department", "designation", "date_of_joining", "basic_salary"]
-                updated = False
-                for field in allowed_fields:
-                    if field in request.data:
-                        if field in ["department", "designation"]:
-                            setattr(employee, f"{field}_id", request.data[field])
-                        else:
-                            setattr(employee, field, request.data[field])
-                        updated = True
-                if updated:
-                    employee.save()
-                    return Response(EmployeeSerializer(employee).data)
-                else:
-                    return Response({'error': 'No valid fields to update.'}, status=status.HTTP_400_BAD_REQUEST)
+            else:
+                return Response({'error': 'No valid fields to update.'}, status=status.HTTP_400_BAD_REQUEST)
         elif request.method == 'DELETE':
-            if user.role in ["ADMIN", "HR"]:
+            if role in _ADMIN_HR:
+                # user was joined above, so the Collector can delete it without re-selecting it
                 employee.user.delete()
                 return Response(status=status.HTTP_204_NO_CONTENT)
             else:
@@ -135,17 +275,24 @@ def employee_detail_api(request, pk):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def departments_api(request):
-    departments = Department.objects.prefetch_related("employee_set", "manager")
-    serializer = DepartmentSerializer(departments, many=True)
-    return Response(serializer.data)
+    # One narrow ordered query feeds both the body and its ETag, so polling clients get a 304 cheaply
+    rows = Department.objects.order_by("id").values(*DEPARTMENT_LIST_FIELDS)
+    data = [_department_row(row) for row in rows]
+    etag = _content_etag(data)
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        not_modified["ETag"] = etag
+        return not_modified
+
+    response = Response(data)
+    response["ETag"] = etag
+    return response
 
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@api_roles_required("ADMIN", "HR")
 def update_department_manager_api(request):
-    if request.user.role not in ["ADMIN", "HR"]:
-        return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
-    
     department_id = request.data.get('department_id')
     manager_id = request.data.get('manager_id')
     
@@ -164,38 +311,50 @@ def update_department_manager_api(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def designations_api(request):
-    designations = Designation.objects.all()
-    serializer = DesignationSerializer(designations, many=True)
-    return Response(serializer.data)
+    # Per-process cache: save/delete signals clear only this worker, others catch up within the TTL
+    cached = cache.get(DESIGNATIONS_CACHE_KEY)
+    if cached is None:
+        data = DesignationSerializer(Designation.objects.all(), many=True).data
+        cached = (data, _content_etag(data))
+        cache.set(DESIGNATIONS_CACHE_KEY, cached, DESIGNATIONS_CACHE_TTL)
+    data, etag = cached
+
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        not_modified["ETag"] = etag
+        return not_modified
+
+    response = Response(data)
+    response["ETag"] = etag
+    return response
 
 
 @api_view(['GET', 'PUT'])
 @permission_classes([IsAuthenticated])
 def employee_profile_api(request):
     user = request.user
-    profile, _ = EmployeeProfile.objects.get_or_create(user=user)
     
     if request.method == 'GET':
+        # Include employee record if exists; its join also brings the profile along
+        emp_record = Employee.objects.select_related(
+            "user", "department", "designation", "user__profile"
+        ).filter(user=user).first()
+        profile = _user_profile(emp_record.user if emp_record else user)
         serializer = EmployeeProfileSerializer(profile, context={'request': request})
         
-        # Include employee record if exists
-        try:
-            emp_record = Employee.objects.get(user=user)
-            data = serializer.data
-            data['employee_record'] = EmployeeSerializer(emp_record).data
-            return Response(data)
-        except Employee.DoesNotExist:
+        if emp_record is None:
             return Response(serializer.data)
+        data = serializer.data
+        data['employee_record'] = EmployeeSerializer(emp_record).data
+        return Response(data)
     
     elif request.method == 'PUT':
         serializer = EmployeeProfileSerializer(
-            profile, data=request.data, partial=True, context={'request': request}
+            _user_profile(user), data=request.data, partial=True, context={'request': request}
         )
         if serializer.is_valid():
-            serializer.save()
-            # Reset verification on update
-            profile.verified = False
-            profile.save()
+            # Reset verification on update, in the same UPDATE as the edited fields
+            serializer.save(verified=False)
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -207,30 +366,34 @@ def view_profile_api(request):
     user = request.user
     role = getattr(user, 'role', None)
     
-    logged_in_emp = None
-    if role in ["MANAGER", "EMPLOYEE"]:
-        try:
-            logged_in_emp = Employee.objects.get(user=user)
-        except Employee.DoesNotExist:
-            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+    employee_qs = Employee.objects.select_related("user", "department", "designation", "user__profile")
     
     if not emp_id:
-        if not logged_in_emp:
+        target = None
+        if role in ["MANAGER", "EMPLOYEE"]:
+            target = employee_qs.filter(user=user).first()
+        if not target:
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
-        target = logged_in_emp
     else:
-        target = get_object_or_404(Employee, employee_id=emp_id)
+        logged_in_emp = None
+        if role in ["MANAGER", "EMPLOYEE"]:
+            # Only the ids are needed for the permission checks below
+            logged_in_emp = Employee.objects.filter(user=user).values("id", "department_id", "user_id").first()
+            if not logged_in_emp:
+                return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
-        if role in ["ADMIN", "HR"]:
+        target = get_object_or_404(employee_qs, employee_id=emp_id)
+        
+        if role in _ADMIN_HR:
             pass
         elif role == "MANAGER":
-            if not logged_in_emp or target.department_id != logged_in_emp.department_id:
+            if not logged_in_emp or target.department_id != logged_in_emp["department_id"]:
                 return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         else:
-            if not logged_in_emp or target.user_id != user.id:
+            if not logged_in_emp or target.user_id != logged_in_emp["user_id"]:
                 return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
     
-    profile, _ = EmployeeProfile.objects.get_or_create(user=target.user)
+    profile = _user_profile(target.user)
     
     return Response({
         'employee': EmployeeSerializer(target).data,
@@ -240,11 +403,9 @@ def view_profile_api(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@api_roles_required("ADMIN", "HR")
 def pending_profiles_api(request):
-    if request.user.role not in ["ADMIN", "HR"]:
-        return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
-    
-    pending = EmployeeProfile.objects.filter(
+    pending = EmployeeProfile.objects.select_related("user").filter(
         verified=False,
         user__role="EMPLOYEE"
     )
@@ -254,11 +415,10 @@ def pending_profiles_api(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@api_roles_required("ADMIN", "HR")
 def approve_profile_api(request, profile_id):
-    if request.user.role not in ["ADMIN", "HR"]:
-        return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
-    
-    profile = get_object_or_404(EmployeeProfile, id=profile_id)
-    profile.verified = True
-    profile.save()
+    # update() bypasses auto_now, so updated_at is set explicitly
+    updated = EmployeeProfile.objects.filter(id=profile_id).update(verified=True, updated_at=timezone.now())
+    if not updated:
+        raise Http404("No EmployeeProfile matches the given query.")
     return Response({'message': 'Profile approved successfully'})
@@ -0,0 +1,4 @@
+# Cache key for the serialized designation list served by designations_api
+DESIGNATIONS_CACHE_KEY = "designations_v2"
+# Kept short because the default cache is per process and other workers are not invalidated
+DESIGNATIONS_CACHE_TTL = 30
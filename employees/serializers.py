@@ -69,7 +69,8 @@ class EmployeeCreateSerializer(serializers.Serializer):
     first_name = serializers.CharField(required=False, allow_blank=True)
     last_name = serializers.CharField(required=False, allow_blank=True)
     email = serializers.EmailField(required=False, allow_blank=True)
-    department = serializers.PrimaryKeyRelatedField(queryset=Department.objects.all())
-    designation = serializers.PrimaryKeyRelatedField(queryset=Designation.objects.all())
+    # Only the columns EmployeeSerializer reads back; each lookup stays a narrow single-row SELECT
+    department = serializers.PrimaryKeyRelatedField(queryset=Department.objects.only("id", "name"))
+    designation = serializers.PrimaryKeyRelatedField(queryset=Designation.objects.only("id", "name"))
     date_of_joining = serializers.DateField()
     basic_salary = serializers.DecimalField(max_digits=10, decimal_places=2)
@@ -1,7 +1,9 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.conf import settings
-from .models import Employee
+from django.core.cache import cache
+from .models import Employee, Designation
+from .cache import DESIGNATIONS_CACHE_KEY
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_employee_profile(sender, instance, created, **kwargs):
@@ -25,3 +27,9 @@ def create_employee_profile(sender, instance, created, **kwargs):
     # Generate employee ID automatically
     emp.employee_id = f"E{emp.id:04d}"
     emp.save()
+
+
+@receiver(post_save, sender=Designation)
+@receiver(post_delete, sender=Designation)
+def invalidate_designations_cache(sender, **kwargs):
+    cache.delete(DESIGNATIONS_CACHE_KEY)
@@ -1,3 +1,100 @@
+import json
+from unittest.mock import patch
+
 from django.test import TestCase
 
-# Create your tests here.
+from accounts.models import User
+from employees.models import Department, Designation, Employee
+from employees.serializers import DepartmentSerializer, EmployeeSerializer
+from employees.api_views import (
+    DEPARTMENT_LIST_FIELDS, EMPLOYEE_LIST_FIELDS, EmployeeListPagination,
+    _department_row, _employee_list_row
+)
+
+
+class DepartmentRowTests(TestCase):
+    def test_matches_department_serializer(self):
+        named = User.objects.create_user('named', password='x', role='EMPLOYEE', first_name='Ann', last_name='Lee')
+        unnamed = User.objects.create_user('unnamed', password='x', role='EMPLOYEE')
+        Department.objects.create(name='Eng', manager=named.employee)
+        Department.objects.create(name='Ops', manager=unnamed.employee)
+        Department.objects.create(name='Sales')
+
+        rows = Department.objects.order_by('id').values(*DEPARTMENT_LIST_FIELDS)
+        expected = DepartmentSerializer(
+            Department.objects.select_related('manager__user').order_by('id'), many=True
+        ).data
+        self.assertEqual([_department_row(row) for row in rows], expected)
+
+
+class EmployeeListRowTests(TestCase):
+    def test_matches_employee_serializer(self):
+        department = Department.objects.create(name='Eng')
+        designation = Designation.objects.create(name='Dev')
+        placed = User.objects.create_user('placed', password='x', role='EMPLOYEE', email='p@example.com')
+        Employee.objects.filter(user=placed).update(
+            department=department, designation=designation, basic_salary='1234.5', date_of_joining='2024-02-29'
+        )
+        no_department = User.objects.create_user('nodept', password='x', role='EMPLOYEE')
+        Employee.objects.filter(user=no_department).update(designation=designation)
+        no_designation = User.objects.create_user('nodesig', password='x', role='EMPLOYEE')
+        Employee.objects.filter(user=no_designation).update(department=department)
+        User.objects.create_user('unplaced', password='x', role='EMPLOYEE')
+        department.manager = Employee.objects.get(user=placed)
+        department.save()
+
+        rows = Employee.objects.order_by('id').values(*EMPLOYEE_LIST_FIELDS)
+        expected = EmployeeSerializer(Employee.objects.order_by('id'), many=True).data
+        self.assertEqual([_employee_list_row(row) for row in rows], expected)
+
+
+class EmployeeListApiTests(TestCase):
+    url = '/api/employees/list/'
+
+    def setUp(self):
+        admin = User.objects.create_user('admin', password='x', role='ADMIN')
+        for i in range(5):
+            User.objects.create_user(f'emp{i}', password='x', role='EMPLOYEE')
+        self.ids = list(Employee.objects.order_by('id').values_list('id', flat=True))
+        self.client.force_login(admin)
+
+    def result_ids(self, results):
+        return [row['id'] for row in results]
+
+    def test_limit_offset_returns_paginated_envelope(self):
+        data = self.client.get(self.url, {'limit': 2, 'offset': 1}).json()
+        self.assertEqual(data['count'], 5)
+        self.assertEqual(self.result_ids(data['results']), self.ids[1:3])
+        self.assertIn('offset=3', data['next'])
+
+    def test_after_with_limit_returns_keyset_page(self):
+        data = self.client.get(self.url, {'after': self.ids[0], 'limit': 2}).json()
+        self.assertEqual(set(data), {'next_after', 'results'})
+        self.assertEqual(self.result_ids(data['results']), self.ids[1:3])
+        self.assertEqual(data['next_after'], self.ids[2])
+
+        last = self.client.get(self.url, {'after': self.ids[2], 'limit': 2}).json()
+        self.assertEqual(self.result_ids(last['results']), self.ids[3:5])
+        self.assertIsNone(last['next_after'])
+
+    def test_non_integer_after_is_rejected(self):
+        for after in ('abc', '1.5'):
+            response = self.client.get(self.url, {'after': after})
+            self.assertEqual(response.status_code, 400)
+
+    def test_without_limit_streams_full_list(self):
+        response = self.client.get(self.url)
+        self.assertTrue(response.streaming)
+        self.assertEqual(self.result_ids(json.loads(b''.join(response.streaming_content))), self.ids)
+
+        response = self.client.get(self.url, {'after': self.ids[2]})
+        self.assertEqual(self.result_ids(json.loads(b''.join(response.streaming_content))), self.ids[3:])
+
+    def test_limit_is_capped_on_both_paths(self):
+        with patch.object(EmployeeListPagination, 'max_limit', 2):
+            data = self.client.get(self.url, {'limit': 10000000}).json()
+            self.assertEqual(len(data['results']), 2)
+
+            data = self.client.get(self.url, {'after': 0, 'limit': 10000000}).json()
+            self.assertEqual(self.result_ids(data['results']), self.ids[:2])
+            self.assertEqual(data['next_after'], self.ids[1])
@@ -93,6 +93,12 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Reuse connections across requests instead of reconnecting each time;
+        # put pgbouncer in front when running on PostgreSQL in production. In transaction
+        # pooling mode also set 'DISABLE_SERVER_SIDE_CURSORS': True, or the streamed
+        # employee list (QuerySet.iterator()) breaks
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 